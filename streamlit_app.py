@@ -1,28 +1,32 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
+import pyarrow as pa
 from datetime import datetime, timedelta
-import time
 from streamlit_gsheets import GSheetsConnection
+from streamlit_autorefresh import st_autorefresh
 import matplotlib.pyplot as plt
 import base64
-import seaborn as sns
+import plotly.express as px
 from PIL import Image
 import requests
-import io
 from io import BytesIO
 
 # Set up the Streamlit page configuration
 st.set_page_config(page_title="Illegal Parking Monitoring", page_icon="🚬", layout="wide")
 
-# Title and description
-st.title("Illegal Parking Monitoring")
-st.subheader("📘 Capstone Project Group 26")
-st.write(
-    """
-    A real-time dashboard connecting to a Google Spreadsheet to monitor illegal parking activity. 
-    View live detections, analyze trends, and explore historical data.
-    """
-)
+# Rerun the script every 5 seconds to pick up new data
+st_autorefresh(interval=5000, key="auto_refresh")
+
+# Title and description, emitted as a single markdown block on each rerun
+STATIC_HEADER = """
+# Illegal Parking Monitoring
+### 📘 Capstone Project Group 26
+
+A real-time dashboard connecting to a Google Spreadsheet to monitor illegal parking activity.
+View live detections, analyze trends, and explore historical data.
+"""
+st.markdown(STATIC_HEADER)
 
 # Real-time clock
 st.subheader("⏰ Current Time (UTC+7)")
@@ -35,6 +39,9 @@ gmt_plus_7 = timedelta(hours=7)
 def get_current_time():
     return (datetime.utcnow() + gmt_plus_7).strftime("%H:%M:%S")
 
+# Update real-time clock
+clock_placeholder.subheader(get_current_time())
+
 # Function to convert Google Drive link to direct link
 def convert_gdrive_link(url):
     if "drive.google.com" in url and "/file/d/" in url:
@@ -42,17 +49,28 @@ def convert_gdrive_link(url):
         return f"https://drive.google.com/uc?id={file_id}"
     return url
 
-# Cache the data loading function with a TTL of 5 seconds
-@st.cache_data(ttl=5)
+# Shared HTTP session so image fetches reuse pooled connections across reruns
+@st.cache_resource
+def get_session():
+    return requests.Session()
+
+# Cache the decoded image so unchanged detections don't refetch it every rerun
+@st.cache_data(ttl=30, show_spinner=False)
+def fetch_image(url):
+    if url.startswith(("http://", "https://")):
+        response = get_session().get(url, timeout=(2, 5))
+        response.raise_for_status()
+        image_data = response.content
+    else:
+        image_data = base64.b64decode(url)
+    return Image.open(BytesIO(image_data)).copy()
+
+# Load the data; the connection caches the sheet read with a TTL of 5 seconds
 def load_data():
     # Create a connection to Google Sheets
     url = "https://docs.google.com/spreadsheets/d/1bcept49fnUiGc3s5ou_68MLuwhhzhNUNvNMANesQ1Zk/edit?usp=sharing"
     conn = st.connection("gsheets", type=GSheetsConnection)
-    df = conn.read(spreadsheet=url, header=0)
-
-    # Debugging: Show the raw data from Google Sheets
-    st.write("Raw data loaded from Google Spreadsheet:")
-    st.write(df)
+    df = conn.read(spreadsheet=url, header=0, ttl=5)
 
     # Validate number of columns
     if len(df.columns) == 4:
@@ -67,10 +85,61 @@ def load_data():
     # Convert Google Drive links to direct links
     df["Image_URL"] = df["Image_URL"].apply(lambda x: convert_gdrive_link(x) if pd.notna(x) else x)
 
-    # Remove empty columns
-    df = df.dropna(axis=1, how="all")
+    # Keep only the expected columns
+    df = df[["Date", "Time", "Detection", "Image_URL"]]
+
+    # Use compact dtypes: Arrow-backed strings and 8-bit detection flags
+    df["Date"] = df["Date"].astype("string[pyarrow]")
+    df["Time"] = df["Time"].astype("string[pyarrow]")
+    df["Detection"] = pd.to_numeric(df["Detection"], errors="coerce").fillna(0).astype("int8")
+
+    # Parse the time column once per load
+    df["Time_dt"] = pd.to_datetime(df["Time"], format="%H:%M:%S", errors="coerce")
+    df["Hour"] = df["Time_dt"].dt.hour
     return df
 
+# Cache chart figures keyed on their plotted inputs, so reruns with unchanged
+# data skip rebuilding them
+cache_figure = st.cache_data(ttl=5)
+
+@cache_figure
+def plot_detection_pie(total_detections, total_images):
+    fig, ax = plt.subplots()
+    labels = ['Detected', 'Not Detected']
+    sizes = [total_detections, total_images - total_detections]
+    colors = ['#2ecc71', '#e74c3c']  # Hijau untuk Detected, Merah untuk Not Detected
+    ax.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=90, colors=colors)
+    ax.axis('equal')
+    plt.close(fig)
+    return fig
+
+@cache_figure
+def plot_cumulative_rate(times, cumulative_rate):
+    fig, ax = plt.subplots(figsize=(10, 5))
+    ax.plot(times, cumulative_rate, label="Cumulative Violation Rate", color="brown")
+    ax.set_title("Cumulative Violation Rate")
+    ax.set_xlabel("Time")
+    ax.set_ylabel("Detection Rate (%)")
+    ax.legend()
+    ax.grid(True)
+    plt.close(fig)
+    return fig
+
+@cache_figure
+def plot_hourly_heatmap(hourly):
+    heatmap_data = hourly.to_frame("Detections")
+
+    fig = px.imshow(
+        heatmap_data.T,
+        text_auto=True,
+        color_continuous_scale="YlGnBu",
+        labels={"x": "Hours (24-Hour Format)", "y": "Key Count", "color": "Detections"},
+        title="Heatmap: Time vs Key Count",
+    )
+    fig.update_xaxes(dtick=1)
+    fig.update_layout(coloraxis_showscale=False)
+    return fig
+
 # Load and process the data
 df = load_data()
 
@@ -94,19 +163,38 @@ if not df.empty:
     # Display the detected image
     if last_image_url:
         try:
-            image_data = base64.b64decode(last_image_url)
-            image = Image.open(io.BytesIO(image_data))
+            image = fetch_image(last_image_url)
             st.image(image, caption="Latest Detection Image", use_container_width=True)
 
         except Exception as e:
             st.error(f"Failed to decode or display image: {e}")
 
-    # Metrics
-    total_images = len(df)
-    total_detections = df["Detection"].sum()
-    detection_rate = (total_detections / total_images) * 100 if total_images > 0 else 0
+    # Metrics, derived from a single cumulative pass over Detection
+    detections = df["Detection"].to_numpy(dtype=np.int64)
+    detection_cumsum = detections.cumsum()
+    total_images = detection_cumsum.size
+    total_detections = int(detection_cumsum[-1])
+    cumulative_rate = detection_cumsum * (100.0 / np.arange(1, total_images + 1))
+    detection_rate = (total_detections / total_images) * 100
     avg_detections_per_hour = total_detections / 24 if total_detections > 0 else 0
 
+    # Rebuild the charts only when any row of the sheet has changed
+    fingerprint = int(pd.util.hash_pandas_object(df[["Date", "Time", "Detection"]], index=False).sum())
+    if st.session_state.get("fp") != fingerprint:
+        hourly = (
+            df.groupby("Hour", sort=False)["Detection"].sum()
+            .reindex(range(24), fill_value=0)
+            .astype("int32")
+        )
+        hourly.index.name = "Hour"
+        st.session_state["charts"] = {
+            "pie": plot_detection_pie(total_detections, total_images),
+            "cumulative": plot_cumulative_rate(df["Time_dt"].to_numpy(), cumulative_rate),
+            "heatmap": plot_hourly_heatmap(hourly),
+        }
+        st.session_state["fp"] = fingerprint
+    charts = st.session_state["charts"]
+
     # Display Metrics and Pie Chart
     st.subheader("📊 Historical Data Insights")
     col1, col2 = st.columns(2)
@@ -123,58 +211,21 @@ if not df.empty:
         )
 
     with col2:
-        fig1, ax1 = plt.subplots()
-        labels = ['Detected', 'Not Detected']
-        sizes = [total_detections, total_images - total_detections]
-        colors = ['#2ecc71', '#e74c3c']  # Hijau untuk Detected, Merah untuk Not Detected
-        ax1.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=90, colors=colors)
-        ax1.axis('equal')
-        st.pyplot(fig1)
+        st.pyplot(charts["pie"])
 
     # Cumulative Cumulative Violation Rate Graph
     st.subheader("📈 Cumulative Violation Rate")
-    fig2, ax2 = plt.subplots(figsize=(10, 5))
-    df["Time"] = pd.to_datetime(df["Time"], format="%H:%M:%S", errors="coerce")
-    detection_cumsum = df["Detection"].cumsum() / (df.index + 1) * 100
-    ax2.plot(df["Time"], detection_cumsum, label="Cumulative Violation Rate", color="brown")
-    ax2.set_title("Cumulative Violation Rate")
-    ax2.set_xlabel("Time")
-    ax2.set_ylabel("Detection Rate (%)")
-    ax2.legend()
-    ax2.grid(True)
-    st.pyplot(fig2)
+    st.pyplot(charts["cumulative"])
 
     # Heatmap Section
     st.subheader("🔥 Heatmap: Time vs Key Count")
-    df["Hour"] = df["Time"].dt.hour
-    hourly_counts = df.groupby("Hour")["Detection"].sum().reset_index()
-    heatmap_data = pd.DataFrame({
-        "Hour": range(24),
-        "Detections": [
-            hourly_counts.loc[hourly_counts["Hour"] == h, "Detection"].sum()
-            if h in hourly_counts["Hour"].values else 0 for h in range(24)
-        ]
-    }).set_index("Hour")
-
-    fig3, ax3 = plt.subplots(figsize=(10, 5))
-    sns.heatmap(heatmap_data.T, annot=True, fmt=".0f", cmap="YlGnBu", cbar_kws={"label": "Detections"}, ax=ax3)
-    ax3.set_title("Heatmap: Time vs Key Count")
-    ax3.set_xlabel("Hours (24-Hour Format)")
-    ax3.set_ylabel("Key Count")
-    st.pyplot(fig3)
+    st.plotly_chart(charts["heatmap"], use_container_width=True)
 
     # Display Historical Data Table
     st.subheader("📋 Historical Data Table")
-    st.dataframe(df[["Date", "Time", "Detection", "Image_URL"]])
-
-# Main loop for clock update and timed rerun
-start_time = time.time()
-
-# Update real-time clock
-while True:
-    current_time = get_current_time()
-    clock_placeholder.subheader(f"{current_time}")
-    time.sleep(1)
-    if time.time() - start_time >= 5:
-        st.cache_data.clear()
-        st.rerun()
\ No newline at end of file
+    history_table = pa.Table.from_pandas(
+        df[["Date", "Time", "Detection", "Image_URL"]], preserve_index=False
+    )
+    st.dataframe(history_table)
+else:
+    st.warning("No data available in the Google Spreadsheet.")